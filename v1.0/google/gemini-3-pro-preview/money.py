@@ -1,17 +1,149 @@
-from fastapi import FastAPI
+#!/usr/bin/env python3
+"""
+Prompt Shop — one-page FastAPI storefront selling a prompt pack through
+Stripe Checkout. The HTML shell is assembled once at import time and the
+stylesheet is served separately with an immutable cache header.
+"""
 
-from app.core.config import settings
+import os
+
+import stripe
+import uvicorn
+from fastapi import FastAPI, Response
+from fastapi.responses import RedirectResponse
+
+stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
+
+DOMAIN = os.getenv("APP_DOMAIN", "http://localhost:8000")
+PORT = int(os.getenv("PORT", "8000"))
+PRICE_ID = os.getenv("STRIPE_PRICE_ID", "")
+
+app = FastAPI(title="Prompt Shop")
+
+_STYLESHEET = b"""body {
+  font-family: -apple-system, "Segoe UI", sans-serif;
+  background: #0f1117;
+  color: #e8e8f0;
+  display: flex;
+  justify-content: center;
+  padding-top: 8vh;
+}
+.card {
+  background: #1a1d27;
+  border-radius: 12px;
+  padding: 40px 48px;
+  max-width: 460px;
+  text-align: center;
+  box-shadow: 0 8px 30px rgba(0, 0, 0, 0.4);
+}
+.card h1 { margin-top: 0; }
+.price { font-size: 2.4em; font-weight: 700; color: #7c8cff; }
+ul { text-align: left; line-height: 1.8; }
+.btn {
+  display: inline-block;
+  background: #7c8cff;
+  color: #0f1117;
+  font-weight: 600;
+  padding: 14px 36px;
+  border-radius: 8px;
+  text-decoration: none;
+  margin-top: 12px;
+}
+"""
+
+# The page shell never changes between requests, so it is encoded once
+# here instead of re-formatting a multi-KB f-string per hit. Pages are
+# header + page-specific body + footer, one bytes concat.
+_HTML_HEADER = (
+    b"<!DOCTYPE html>\n<html>\n<head>\n"
+    b"<title>Prompt Shop</title>\n"
+    b'<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+    b'<link rel="stylesheet" href="/style.css">\n'
+    b"</head>\n<body>\n<div class='card'>\n"
+)
+_HTML_FOOTER = b"\n</div>\n</body>\n</html>"
+
+
+def get_html_base(content: str) -> bytes:
+    return _HTML_HEADER + content.encode() + _HTML_FOOTER
+
+
+_HOME_PAGE = get_html_base(
+    """<h1>💡 The Prompt Pack</h1>
+<p>500 battle-tested prompts for marketing, code and copywriting.</p>
+<div class="price">$29</div>
+<ul>
+<li>Instant download (PDF + Notion)</li>
+<li>Lifetime updates</li>
+<li>Commercial license</li>
+</ul>
+<a class="btn" href="/buy">Buy now</a>"""
+)
+_SUCCESS_PAGE = get_html_base(
+    """<h1>🎉 Thank you!</h1>
+<p>Your download link is on its way to your inbox.</p>
+<a class="btn" href="/">Back to shop</a>"""
+)
+_CANCEL_PAGE = get_html_base(
+    """<h1>Checkout cancelled</h1>
+<p>No charge was made. Changed your mind?</p>
+<a class="btn" href="/">Back to shop</a>"""
+)
+
+
+@app.get("/style.css")
+async def stylesheet():
+    return Response(
+        content=_STYLESHEET,
+        media_type="text/css",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
 
-app = FastAPI(title="API", version="0.0.1")
 
 @app.get("/")
-async def root():
-    return {
-        "message": settings.APP_DOMAIN,
-        "status": "running",
-    }
+async def home():
+    return Response(content=_HOME_PAGE, media_type="text/html")
+
+
+@app.get("/buy")
+async def buy():
+    session = stripe.checkout.Session.create(
+        payment_method_types=["card"],
+        line_items=[{"price": PRICE_ID, "quantity": 1}],
+        mode="payment",
+        success_url=f"{DOMAIN}/success",
+        cancel_url=f"{DOMAIN}/cancel",
+    )
+    return RedirectResponse(session.url, status_code=303)
+
+
+@app.get("/success")
+async def success():
+    return Response(content=_SUCCESS_PAGE, media_type="text/html")
+
+
+@app.get("/cancel")
+async def cancel():
+    return Response(content=_CANCEL_PAGE, media_type="text/html")
 
 
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+if __name__ == "__main__":
+    # Import string (not the app object) so uvicorn can fork workers;
+    # uvloop + httptools roughly double per-worker throughput over the
+    # stdlib loop and h11, and skipping the access log saves a per-
+    # request format+write.
+    uvicorn.run(
+        "money:app",
+        host="0.0.0.0",
+        port=PORT,
+        workers=os.cpu_count(),
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False,
+    )
@@ -1,17 +1,127 @@
-from fastapi import FastAPI
+#!/usr/bin/env python3
+"""
+Link Shortener — Flask + SQLAlchemy URL shortener with click tracking.
+Short codes are base62-encoded row ids, so creating a link is a single
+INSERT with no collision checks.
+"""
 
-from app.core.config import settings
+import os
+import string
 
-app = FastAPI(title="API", version="0.0.1")
+from flask import Flask, abort, redirect, render_template_string, request
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import update
 
-@app.get("/")
-async def root():
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
+    "DATABASE_URL", "sqlite:///urls.db"
+)
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db = SQLAlchemy(app)
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:5000")
+
+# Offset keeps codes at 4+ chars and makes id=1 not read as "1".
+_BASE62_ALPHABET = string.digits + string.ascii_letters
+_ID_OFFSET = 240_000
+
+
+def base62_encode(n: int) -> str:
+    """Encode a non-negative integer in base62 (digits, then a-z, A-Z)."""
+    if n == 0:
+        return _BASE62_ALPHABET[0]
+    chars = []
+    while n:
+        n, rem = divmod(n, 62)
+        chars.append(_BASE62_ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+class URL(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    original_url = db.Column(db.Text, nullable=False)
+    short_url = db.Column(db.String(16), unique=True, nullable=True)
+    clicks = db.Column(db.Integer, default=0, nullable=False)
+
+
+with app.app_context():
+    db.create_all()
+
+
+HOME_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<title>Link Shortener</title>
+<style>
+body { font-family: sans-serif; max-width: 560px; margin: 60px auto; }
+input[type=url] { width: 100%; padding: 10px; }
+button { padding: 10px 20px; margin-top: 8px; }
+.result { margin-top: 20px; padding: 12px; background: #eef; }
+</style>
+</head>
+<body>
+<h1>🔗 Link Shortener</h1>
+<form method="post">
+<input type="url" name="url" placeholder="https://example.com/very/long/link" required>
+<button type="submit">Shorten</button>
+</form>
+{% if short_link %}
+<div class="result">
+<a href="{{ short_link }}">{{ short_link }}</a>
+</div>
+{% endif %}
+</body>
+</html>"""
+
+
+@app.route("/", methods=["GET", "POST"])
+def home():
+    short_link = None
+    if request.method == "POST":
+        original_url = request.form["url"]
+        # The short code is the base62 of the autoincrement id: one
+        # INSERT, no uniqueness probing against the existing keyspace.
+        url = URL(original_url=original_url)
+        db.session.add(url)
+        db.session.flush()
+        url.short_url = base62_encode(url.id + _ID_OFFSET)
+        db.session.commit()
+        short_link = f"{BASE_URL}/{url.short_url}"
+    return render_template_string(HOME_TEMPLATE, short_link=short_link)
+
+
+@app.route("/<short_url>")
+def redirect_to_url(short_url):
+    # Read only the target column, then bump the counter with a single
+    # atomic UPDATE — the read-modify-write through the ORM row both cost
+    # an extra round trip and lost updates under concurrent redirects.
+    row = (
+        db.session.query(URL.original_url)
+        .filter_by(short_url=short_url)
+        .first()
+    )
+    if row is None:
+        abort(404)
+    db.session.execute(
+        update(URL)
+        .where(URL.short_url == short_url)
+        .values(clicks=URL.clicks + 1)
+    )
+    db.session.commit()
+    return redirect(row.original_url)
+
+
+@app.route("/<short_url>/stats")
+def stats(short_url):
+    url = URL.query.filter_by(short_url=short_url).first()
+    if url is None:
+        abort(404)
     return {
-        "message": settings.APP_DOMAIN,
-        "status": "running",
+        "short_url": url.short_url,
+        "original_url": url.original_url,
+        "clicks": url.clicks,
     }
 
 
-@app.get("/health")
-async def health():
-    return {"status": "healthy"}
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
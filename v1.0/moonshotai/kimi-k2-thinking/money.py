@@ -1,17 +1,1113 @@
-from fastapi import FastAPI
+#!/usr/bin/env python3
+"""
+AI Content Generator SaaS
+FastAPI app selling AI-written marketing copy on a freemium model:
+API-key auth, per-tier monthly quotas backed by SQLite, Stripe checkout
+for upgrades, and a minimal HTML dashboard.
+"""
 
-from app.core.config import settings
+import asyncio
+import functools
+import gzip
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from enum import IntEnum
+from typing import Dict, List, Optional
 
-app = FastAPI(title="API", version="0.0.1")
+import aiohttp
+import msgspec
+import numpy as np
+import orjson
+from cachetools import TTLCache
 
-@app.get("/")
-async def root():
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # semantic cache degrades to exact-match only
+    SentenceTransformer = None
+
+try:
+    import redis.asyncio as redis_async
+except ImportError:  # rate limiting falls back to the sqlite counter
+    redis_async = None
+import stripe
+import uvicorn
+from fastapi import (
+    BackgroundTasks,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+)
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+CONFIG = {
+    "db_path": os.getenv("DB_PATH", "saas.db"),
+    "redis_url": os.getenv("REDIS_URL", ""),
+    "openai_api_key": os.getenv("OPENAI_API_KEY", ""),
+    "stripe_secret_key": os.getenv("STRIPE_SECRET_KEY", ""),
+    "stripe_webhook_secret": os.getenv("STRIPE_WEBHOOK_SECRET", ""),
+    "domain": os.getenv("APP_DOMAIN", "http://localhost:8000"),
+    "port": int(os.getenv("PORT", "8000")),
+}
+
+stripe.api_key = CONFIG["stripe_secret_key"]
+
+# Chat traffic can be pointed at a self-hosted vLLM server instead of
+# OpenAI. With vLLM's --enable-prefix-caching, our four content-type
+# prefixes are byte-identical across users, so their prefill KV blocks
+# are computed once and reused.
+PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+_API_BASE = (
+    "https://api.openai.com/v1"
+    if PROVIDER == "openai"
+    else os.getenv("LLM_BASE_URL", "http://localhost:8001/v1")
+)
+
+# One pooled aiohttp session for outbound OpenAI HTTP, created on the
+# event loop at startup. aiohttp holds its throughput at high in-flight
+# counts where httpx's async client degrades, and the connector caps
+# fan-out at 200 connections with DNS results cached for 5 minutes.
+AIOHTTP_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+async def _chat_stream(messages: list, max_tokens: int):
+    """Yield content deltas from a streamed chat completion."""
+    async with AIOHTTP_SESSION.post(
+        f"{_API_BASE}/chat/completions",
+        headers={"Authorization": f"Bearer {CONFIG['openai_api_key']}"},
+        json={
+            "model": MODEL,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "stream": True,
+        },
+    ) as resp:
+        if resp.status != 200:
+            raise HTTPException(status_code=502, detail="Generation failed")
+        async for raw in resp.content:
+            line = raw.strip()
+            if not line.startswith(b"data: "):
+                continue
+            payload = line[6:]
+            if payload == b"[DONE]":
+                break
+            delta = orjson.loads(payload)["choices"][0]["delta"].get("content")
+            if delta:
+                yield delta
+
+
+async def _chat(messages: list, max_tokens: int) -> str:
+    """POST a chat completion and return the message content."""
+    async with AIOHTTP_SESSION.post(
+        f"{_API_BASE}/chat/completions",
+        headers={"Authorization": f"Bearer {CONFIG['openai_api_key']}"},
+        json={
+            "model": MODEL,
+            "messages": messages,
+            "max_tokens": max_tokens,
+        },
+    ) as resp:
+        if resp.status != 200:
+            raise HTTPException(status_code=502, detail="Generation failed")
+        data = await resp.json()
+    return data["choices"][0]["message"]["content"]
+
+class Tier(IntEnum):
+    FREE = 0
+    PRO = 1
+    BUSINESS = 2
+
+
+@dataclass(frozen=True, slots=True)
+class TierSpec:
+    name: str
+    generations: int
+    price: int
+    stripe_price_id: str
+
+
+# Indexed by Tier value: quota checks are one tuple index + attribute
+# deref instead of hashing tier-name strings on the hot path.
+TIER_TABLE: tuple = (
+    TierSpec("free", 5, 0, ""),
+    TierSpec("pro", 100, 19, os.getenv("STRIPE_PRICE_PRO", "")),
+    TierSpec("business", 1000, 79, os.getenv("STRIPE_PRICE_BUSINESS", "")),
+)
+_TIER_BY_NAME = {spec.name: Tier(i) for i, spec in enumerate(TIER_TABLE)}
+
+CONTENT_PROMPTS = {
+    "product_description": "Write Product Description copy: ",
+    "social_post": "Write Social Media Post copy: ",
+    "email_subject": "Write Email Subject Line copy: ",
+    "blog_intro": "Write Blog Introduction copy: ",
+}
+
+# --- Database -------------------------------------------------------------
+# One long-lived autocommit connection per worker thread: connect() is
+# paid once per thread instead of per request, and WAL lets those
+# threads read concurrently while one writes (busy_timeout covers
+# writer contention), so the old process-wide lock is gone.
+
+_SQL_INSERT_USER = (
+    "INSERT INTO users (id, email, api_key, key_hash, tier, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_SELECT_USER_BY_KEY = "SELECT * FROM users WHERE key_hash = ?"
+_SQL_UPDATE_TIER = "UPDATE users SET tier = ? WHERE id = ?"
+_SQL_INSERT_USAGE = (
+    "INSERT INTO usage (user_id, content_type, timestamp) VALUES (?, ?, ?)"
+)
+_SQL_BUMP_MONTH = (
+    "INSERT INTO user_month (user_id, ym, cnt) VALUES (?, ?, 1) "
+    "ON CONFLICT(user_id, ym) DO UPDATE SET cnt = cnt + 1"
+)
+_SQL_GET_MONTH = "SELECT cnt FROM user_month WHERE user_id = ? AND ym = ?"
+
+# L1 caches in front of sqlite: api_key -> user is effectively immutable
+# on the scale of minutes, and the rate-limit counter tolerates ~10s of
+# staleness. Locked because FastAPI runs sync dependencies in a thread
+# pool; record_usage invalidates the counter so post-increment reads are
+# exact.
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+_usage_cache: TTLCache = TTLCache(maxsize=10_000, ttl=10)
+_cache_lock = threading.Lock()
+
+# Identical prompts within the TTL are served from cache; identical
+# prompts already in flight coalesce onto one OpenAI call instead of
+# paying for N duplicates (cache-stampede prevention). Single-threaded
+# on the event loop, so no lock needed around these.
+_completion_cache: TTLCache = TTLCache(maxsize=2_048, ttl=600)
+_inflight: dict = {}
+
+# Double-clicked upgrade buttons shouldn't mint duplicate Stripe
+# sessions; remember the checkout URL per (user, tier) briefly.
+_checkout_cache: TTLCache = TTLCache(maxsize=1_024, ttl=60)
+
+# Second cache tier: near-duplicate prompts (marketing copy requests
+# cluster heavily) are matched by cosine similarity of MiniLM sentence
+# embeddings against a fixed-size ring of recent generations. A hit is
+# one matrix-vector product instead of an OpenAI round trip.
+_SEM_CAPACITY = 2_048
+_SEM_THRESHOLD = 0.92
+_embed_model = None
+_sem_vecs: Optional[np.ndarray] = None
+_sem_types: list = [None] * _SEM_CAPACITY
+_sem_contents: list = [None] * _SEM_CAPACITY
+_sem_count = 0
+
+
+async def _embed(prompt: str) -> Optional[np.ndarray]:
+    if _embed_model is None:
+        return None
+    return await asyncio.to_thread(
+        _embed_model.encode, prompt, normalize_embeddings=True
+    )
+
+
+def _semantic_lookup(emb: np.ndarray, content_type: str) -> Optional[str]:
+    n = min(_sem_count, _SEM_CAPACITY)
+    if n == 0:
+        return None
+    sims = _sem_vecs[:n] @ emb
+    order = np.argsort(sims)[::-1]
+    for i in order:
+        if sims[i] < _SEM_THRESHOLD:
+            return None
+        if _sem_types[i] == content_type:
+            return _sem_contents[i]
+    return None
+
+
+def _semantic_store(emb: np.ndarray, content_type: str, content: str):
+    global _sem_count
+    slot = _sem_count % _SEM_CAPACITY
+    _sem_vecs[slot] = emb
+    _sem_types[slot] = content_type
+    _sem_contents[slot] = content
+    _sem_count += 1
+
+_local = threading.local()
+
+
+def get_db() -> sqlite3.Connection:
+    conn = getattr(_local, "c", None)
+    if conn is None:
+        conn = sqlite3.connect(
+            CONFIG["db_path"], check_same_thread=False, isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in (
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            "PRAGMA temp_store=MEMORY",
+            "PRAGMA busy_timeout=5000",
+        ):
+            conn.execute(pragma)
+        _local.c = conn
+    return conn
+
+
+def init_db():
+    conn = get_db()
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            email TEXT UNIQUE NOT NULL,
+            api_key TEXT UNIQUE NOT NULL,
+            key_hash BLOB UNIQUE NOT NULL,
+            tier INTEGER NOT NULL DEFAULT 0,
+            stripe_customer_id TEXT,
+            created_at TEXT NOT NULL
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            content_type TEXT NOT NULL,
+            timestamp REAL NOT NULL
+        )"""
+    )
+    # Composite index makes ad-hoc usage queries an index-only range
+    # scan instead of a full table scan over all users' rows.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_usage_user_ts "
+        "ON usage(user_id, timestamp DESC)"
+    )
+    # Pre-aggregated per-user monthly counter: the quota read becomes a
+    # single-row primary-key probe instead of counting the month's rows.
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS user_month (
+            user_id TEXT NOT NULL,
+            ym TEXT NOT NULL,
+            cnt INTEGER NOT NULL,
+            PRIMARY KEY (user_id, ym)
+        ) WITHOUT ROWID"""
+    )
+    # UNIQUE already implies an index on key_hash; keep an explicit one
+    # so the lookup path survives the constraint being relaxed later.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_keyhash ON users(key_hash)"
+    )
+
+
+init_db()
+
+
+def _db_execute(sql: str, params: tuple):
+    """Run one statement on the calling thread's connection (call from
+    a worker thread — sqlite I/O would otherwise pin the event loop)."""
+    return get_db().execute(sql, params).fetchone()
+
+
+def _key_hash(api_key: str) -> bytes:
+    """16-byte digest used as the stored credential: a fixed-width BLOB
+    probe instead of a variable-length string compare, and equality on
+    a hash rather than the raw secret."""
+    return hashlib.sha256(api_key.encode()).digest()[:16]
+
+
+async def create_user(email: str) -> Dict:
+    user_id = str(uuid.uuid4())
+    api_key = f"sk-{secrets.token_urlsafe(32)}"
+    await asyncio.to_thread(
+        _db_execute,
+        _SQL_INSERT_USER,
+        (
+            user_id,
+            email,
+            api_key,
+            _key_hash(api_key),
+            int(Tier.FREE),
+            datetime.now().isoformat(),
+        ),
+    )
+    return {"id": user_id, "email": email, "api_key": api_key, "tier": "free"}
+
+
+async def get_user_by_api_key(api_key: str) -> Optional[Dict]:
+    with _cache_lock:
+        user = _user_cache.get(api_key)
+    if user is not None:
+        return user
+    row = await asyncio.to_thread(
+        _db_execute, _SQL_SELECT_USER_BY_KEY, (_key_hash(api_key),)
+    )
+    if row is None:
+        return None
+    user = dict(row)
+    user.pop("key_hash", None)
+    # Fold the tier limit in at fetch time so the per-request quota
+    # check is an int comparison, not a table lookup on every call.
+    user["_gen_limit"] = TIER_TABLE[user["tier"]].generations
+    with _cache_lock:
+        _user_cache[api_key] = user
+    return user
+
+
+# Usage events are buffered and flushed in groups: one transaction (and
+# one WAL append) per batch instead of per generation. The counter read
+# can lag by up to the flush interval, which the 10s usage cache already
+# tolerates.
+USAGE_Q: asyncio.Queue = asyncio.Queue(maxsize=10_000)
+_FLUSH_MAX = 200
+_FLUSH_INTERVAL = 0.1
+
+
+def _flush_usage(batch: list):
+    conn = get_db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            _SQL_INSERT_USAGE,
+            [(uid, ctype, ts) for uid, ctype, ts in batch],
+        )
+        conn.executemany(
+            _SQL_BUMP_MONTH,
+            [
+                (uid, f"{datetime.fromtimestamp(ts):%Y%m}")
+                for uid, _, ts in batch
+            ],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+async def _drain_usage():
+    while True:
+        batch = [await USAGE_Q.get()]
+        await asyncio.sleep(_FLUSH_INTERVAL)
+        try:
+            while len(batch) < _FLUSH_MAX:
+                batch.append(USAGE_Q.get_nowait())
+        except asyncio.QueueEmpty:
+            pass
+        await asyncio.to_thread(_flush_usage, batch)
+
+
+async def record_usage(user_id: str, content_type: str):
+    event = (user_id, content_type, time.time())
+    try:
+        USAGE_Q.put_nowait(event)
+    except asyncio.QueueFull:
+        # Sustained overload: write through rather than drop the event.
+        await asyncio.to_thread(_flush_usage, [event])
+    with _cache_lock:
+        _usage_cache.pop(user_id, None)
+
+
+async def get_monthly_usage(user_id: str) -> int:
+    with _cache_lock:
+        cached = _usage_cache.get(user_id)
+    if cached is not None:
+        return cached
+    row = await asyncio.to_thread(
+        _db_execute, _SQL_GET_MONTH, (user_id, f"{datetime.now():%Y%m}")
+    )
+    count = row[0] if row is not None else 0
+    with _cache_lock:
+        _usage_cache[user_id] = count
+    return count
+
+
+# Token bucket as one atomic round trip: refill by elapsed time, take a
+# token if available. Keyed per user, expiring shortly after idleness.
+_TOKEN_BUCKET_LUA = """
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return allowed
+"""
+_BURST_CAPACITY = 10
+_BURST_RATE = 0.5  # tokens per second
+
+_redis = None
+_bucket = None
+
+
+async def check_rate_limit(user: Dict) -> bool:
+    if _redis is not None:
+        allowed = await _bucket(
+            keys=[f"rl:{user['id']}"],
+            args=[_BURST_CAPACITY, _BURST_RATE, time.time()],
+        )
+        if not allowed:
+            return False
+        # Calendar-month quota as a fixed window: INCR is the
+        # consumption, so the check is O(1) regardless of history and
+        # shared across app instances.
+        month_key = f"rl:{user['id']}:{datetime.now():%Y%m}"
+        used = await _redis.incr(month_key)
+        if used == 1:
+            await _redis.expire(month_key, 35 * 86400)
+        return used <= user["_gen_limit"]
+    return await get_monthly_usage(user["id"]) < user["_gen_limit"]
+
+
+# --- API ------------------------------------------------------------------
+
+# orjson serializes the small response dicts several times faster than
+# stdlib json and handles datetimes natively.
+app = FastAPI(
+    title="AI Content Generator", default_response_class=ORJSONResponse
+)
+
+
+@app.on_event("startup")
+async def _open_http_session():
+    global AIOHTTP_SESSION
+    AIOHTTP_SESSION = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=200, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=30),
+    )
+
+
+@app.on_event("startup")
+async def _open_redis():
+    global _redis, _bucket
+    if redis_async is None or not CONFIG["redis_url"]:
+        return
+    _redis = redis_async.from_url(CONFIG["redis_url"])
+    _bucket = _redis.register_script(_TOKEN_BUCKET_LUA)
+
+
+@app.on_event("shutdown")
+async def _close_redis():
+    if _redis is not None:
+        await _redis.aclose()
+
+
+_usage_flusher = None
+
+
+@app.on_event("startup")
+async def _start_usage_flusher():
+    global _usage_flusher
+    _usage_flusher = asyncio.create_task(_drain_usage())
+
+
+@app.on_event("shutdown")
+async def _stop_usage_flusher():
+    if _usage_flusher is not None:
+        _usage_flusher.cancel()
+    remainder = []
+    while not USAGE_Q.empty():
+        remainder.append(USAGE_Q.get_nowait())
+    if remainder:
+        await asyncio.to_thread(_flush_usage, remainder)
+
+
+_warmup_task = None
+
+
+@app.on_event("startup")
+async def _warm_prefix_cache():
+    """Prime vLLM's prefix cache with the shared prompt prefixes."""
+    global _warmup_task
+    if PROVIDER != "vllm":
+        return
+
+    async def warm():
+        for prefix in CONTENT_PROMPTS.values():
+            try:
+                await _chat(
+                    [
+                        {
+                            "role": "system",
+                            "content": "You are a marketing copywriter.",
+                        },
+                        {"role": "user", "content": prefix},
+                    ],
+                    1,
+                )
+            except Exception:
+                return  # server not up yet; first real request warms it
+
+    _warmup_task = asyncio.create_task(warm())
+
+
+@app.on_event("startup")
+async def _load_embed_model():
+    global _embed_model, _sem_vecs
+    if SentenceTransformer is None:
+        return
+    _embed_model = await asyncio.to_thread(
+        SentenceTransformer, "all-MiniLM-L6-v2"
+    )
+    dim = _embed_model.get_sentence_embedding_dimension()
+    _sem_vecs = np.zeros((_SEM_CAPACITY, dim), dtype=np.float32)
+
+
+@app.on_event("shutdown")
+async def _close_http_session():
+    if AIOHTTP_SESSION is not None:
+        await AIOHTTP_SESSION.close()
+
+
+class SignupRequest(BaseModel):
+    email: str
+
+
+class GenerationRequest(msgspec.Struct):
+    prompt: str
+    content_type: str = "product_description"
+    max_length: int = 200
+
+
+class BatchRequest(msgspec.Struct):
+    items: List[GenerationRequest]
+    mode: str = "sync"  # "sync" gathers now; "batch" defers to OpenAI
+
+
+# msgspec decodes straight into typed Structs in C — far cheaper than
+# model validation on these small, high-QPS bodies.
+_GEN_DECODER = msgspec.json.Decoder(GenerationRequest)
+_BATCH_DECODER = msgspec.json.Decoder(BatchRequest)
+
+
+def _decode_body(decoder, body: bytes):
+    try:
+        return decoder.decode(body)
+    except (msgspec.DecodeError, msgspec.ValidationError):
+        raise HTTPException(status_code=422, detail="Invalid request body")
+
+
+async def verify_api_key(x_api_key: str = Header(...)) -> Dict:
+    user = await get_user_by_api_key(x_api_key)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    return user
+
+
+@app.post("/api/v1/signup")
+async def signup(req: SignupRequest):
+    try:
+        return await create_user(req.email)
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=409, detail="Email already registered")
+
+
+async def _generate_one(
+    request: GenerationRequest, user: Dict
+) -> str:
+    if not await check_rate_limit(user):
+        raise HTTPException(
+            status_code=429,
+            detail="Monthly generation limit reached. Upgrade your plan.",
+        )
+    prefix = CONTENT_PROMPTS.get(
+        request.content_type, CONTENT_PROMPTS["product_description"]
+    )
+    key = hashlib.sha256(
+        f"{request.content_type}:{request.max_length}:{request.prompt}"
+        .encode()
+    ).hexdigest()
+    content = _completion_cache.get(key)
+    emb = None
+    if content is None:
+        emb = await _embed(request.prompt)
+        if emb is not None:
+            content = _semantic_lookup(emb, request.content_type)
+    if content is None:
+        fut = _inflight.get(key)
+        if fut is not None:
+            content = await asyncio.shield(fut)
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            _inflight[key] = fut
+            try:
+                try:
+                    content = await _chat(
+                        [
+                            {
+                                "role": "system",
+                                "content": "You are a marketing copywriter.",
+                            },
+                            {
+                                "role": "user",
+                                "content": prefix + request.prompt,
+                            },
+                        ],
+                        request.max_length,
+                    )
+                except aiohttp.ClientError:
+                    raise HTTPException(
+                        status_code=502, detail="Generation failed"
+                    )
+            except BaseException as exc:
+                fut.set_exception(exc)
+                _inflight.pop(key, None)
+                raise
+            fut.set_result(content)
+            _inflight.pop(key, None)
+            _completion_cache[key] = content
+            if emb is not None:
+                _semantic_store(emb, request.content_type, content)
+    await record_usage(user["id"], request.content_type)
+    return content
+
+
+def _sse(obj: dict) -> bytes:
+    return b"data: " + orjson.dumps(obj) + b"\n\n"
+
+
+@app.post("/api/v1/generate")
+async def generate_content(
+    request: Request, user: Dict = Depends(verify_api_key)
+):
+    """Stream the generation as SSE frames.
+
+    Time-to-first-token beats waiting for the whole completion by
+    seconds on long copy. Quota is checked before the stream opens so
+    a 429 still arrives as a real status code; usage is recorded when
+    the stream finishes.
+    """
+    gen = _decode_body(_GEN_DECODER, await request.body())
+    if not await check_rate_limit(user):
+        raise HTTPException(
+            status_code=429,
+            detail="Monthly generation limit reached. Upgrade your plan.",
+        )
+    prefix = CONTENT_PROMPTS.get(
+        gen.content_type, CONTENT_PROMPTS["product_description"]
+    )
+    key = hashlib.sha256(
+        f"{gen.content_type}:{gen.max_length}:{gen.prompt}"
+        .encode()
+    ).hexdigest()
+    content = _completion_cache.get(key)
+    emb = None
+    if content is None:
+        emb = await _embed(gen.prompt)
+        if emb is not None:
+            content = _semantic_lookup(emb, gen.content_type)
+
+    async def finish():
+        await record_usage(user["id"], gen.content_type)
+        yield _sse({
+            "done": True,
+            "usage": {
+                "used": await get_monthly_usage(user["id"]),
+                "limit": user["_gen_limit"],
+            },
+        })
+        yield b"data: [DONE]\n\n"
+
+    if content is not None:
+        async def replay(cached: str):
+            yield _sse({"delta": cached})
+            async for frame in finish():
+                yield frame
+
+        return StreamingResponse(
+            replay(content), media_type="text/event-stream"
+        )
+
+    async def stream():
+        parts = []
+        async for delta in _chat_stream(
+            [
+                {
+                    "role": "system",
+                    "content": "You are a marketing copywriter.",
+                },
+                {"role": "user", "content": prefix + gen.prompt},
+            ],
+            gen.max_length,
+        ):
+            parts.append(delta)
+            yield _sse({"delta": delta})
+        full = "".join(parts)
+        _completion_cache[key] = full
+        if emb is not None:
+            _semantic_store(emb, gen.content_type, full)
+        async for frame in finish():
+            yield frame
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.post("/api/v1/generate/batch")
+async def generate_batch(
+    request: Request, user: Dict = Depends(verify_api_key)
+):
+    req = _decode_body(_BATCH_DECODER, await request.body())
+    if not req.items or len(req.items) > 100:
+        raise HTTPException(
+            status_code=400, detail="Batch must contain 1-100 items"
+        )
+    if req.mode == "batch":
+        return await _submit_openai_batch(req.items, user)
+    # Bounded fan-out: 100 items cost ~5 OpenAI round trips of wall
+    # clock instead of 100, while the semaphore keeps us inside rate
+    # limits. Items share the caches and quota path of single calls.
+    sem = asyncio.Semaphore(20)
+
+    async def one(item: GenerationRequest):
+        async with sem:
+            return await _generate_one(item, user)
+
+    results = await asyncio.gather(
+        *(one(item) for item in req.items), return_exceptions=True
+    )
+    out = []
+    for result in results:
+        if isinstance(result, HTTPException):
+            out.append({"error": result.detail})
+        elif isinstance(result, Exception):
+            out.append({"error": "Generation failed"})
+        else:
+            out.append({"content": result})
+    return {
+        "results": out,
+        "usage": {
+            "used": await get_monthly_usage(user["id"]),
+            "limit": user["_gen_limit"],
+        },
+    }
+
+
+async def _submit_openai_batch(items: List[GenerationRequest], user: Dict):
+    """Defer a bulk job to OpenAI's Batch API (24h window, half price)."""
+    lines = []
+    for i, item in enumerate(items):
+        if not await check_rate_limit(user):
+            raise HTTPException(
+                status_code=429,
+                detail=f"Quota exhausted after {i} items",
+            )
+        prefix = CONTENT_PROMPTS.get(
+            item.content_type, CONTENT_PROMPTS["product_description"]
+        )
+        lines.append(orjson.dumps({
+            "custom_id": f"item-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": "gpt-3.5-turbo",
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a marketing copywriter.",
+                    },
+                    {"role": "user", "content": prefix + item.prompt},
+                ],
+                "max_tokens": item.max_length,
+            },
+        }))
+        await record_usage(user["id"], item.content_type)
+    form = aiohttp.FormData()
+    form.add_field("purpose", "batch")
+    form.add_field(
+        "file", b"\n".join(lines), filename="batch.jsonl",
+        content_type="application/jsonl",
+    )
+    headers = {"Authorization": f"Bearer {CONFIG['openai_api_key']}"}
+    async with AIOHTTP_SESSION.post(
+        "https://api.openai.com/v1/files", headers=headers, data=form
+    ) as resp:
+        if resp.status != 200:
+            raise HTTPException(status_code=502, detail="Batch upload failed")
+        file_id = (await resp.json())["id"]
+    async with AIOHTTP_SESSION.post(
+        "https://api.openai.com/v1/batches",
+        headers=headers,
+        json={
+            "input_file_id": file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        },
+    ) as resp:
+        if resp.status != 200:
+            raise HTTPException(status_code=502, detail="Batch submit failed")
+        batch = await resp.json()
+    return {"batch_id": batch["id"], "status": batch["status"]}
+
+
+@app.get("/api/v1/batch/{batch_id}")
+async def get_batch(batch_id: str, user: Dict = Depends(verify_api_key)):
+    headers = {"Authorization": f"Bearer {CONFIG['openai_api_key']}"}
+    async with AIOHTTP_SESSION.get(
+        f"https://api.openai.com/v1/batches/{batch_id}", headers=headers
+    ) as resp:
+        if resp.status != 200:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        batch = await resp.json()
+    if batch["status"] != "completed":
+        return {"batch_id": batch_id, "status": batch["status"]}
+    async with AIOHTTP_SESSION.get(
+        f"https://api.openai.com/v1/files/{batch['output_file_id']}/content",
+        headers=headers,
+    ) as resp:
+        if resp.status != 200:
+            raise HTTPException(
+                status_code=502, detail="Batch output fetch failed"
+            )
+        raw = await resp.read()
+    results = []
+    for line in raw.splitlines():
+        if not line:
+            continue
+        row = orjson.loads(line)
+        body = row["response"]["body"]
+        results.append({
+            "custom_id": row["custom_id"],
+            "content": body["choices"][0]["message"]["content"],
+        })
+    return {"batch_id": batch_id, "status": "completed", "results": results}
+
+
+@app.get("/api/v1/account")
+async def get_account(user: Dict = Depends(verify_api_key)):
     return {
-        "message": settings.APP_DOMAIN,
-        "status": "running",
+        "email": user["email"],
+        "tier": TIER_TABLE[user["tier"]].name,
+        "used": await get_monthly_usage(user["id"]),
+        "limit": user["_gen_limit"],
+    }
+
+
+@app.post("/api/v1/upgrade")
+async def create_checkout_session(
+    tier: str, user: Dict = Depends(verify_api_key)
+):
+    tier_value = _TIER_BY_NAME.get(tier)
+    if tier_value is None or not TIER_TABLE[tier_value].stripe_price_id:
+        raise HTTPException(status_code=400, detail="Invalid tier")
+    cache_key = (user["id"], int(tier_value))
+    url = _checkout_cache.get(cache_key)
+    if url is not None:
+        return {"checkout_url": url}
+    # stripe-python is synchronous HTTP; run the ~300ms Stripe RTT in the
+    # thread pool so concurrent checkouts don't serialize on the loop.
+    session = await asyncio.get_running_loop().run_in_executor(
+        None,
+        functools.partial(
+            stripe.checkout.Session.create,
+            payment_method_types=["card"],
+            line_items=[
+                {"price": TIER_TABLE[tier_value].stripe_price_id, "quantity": 1}
+            ],
+            mode="subscription",
+            client_reference_id=user["id"],
+            success_url=f"{CONFIG['domain']}/success",
+            cancel_url=f"{CONFIG['domain']}/cancel",
+            metadata={"tier": str(int(tier_value))},
+        ),
+    )
+    _checkout_cache[cache_key] = session.url
+    return {"checkout_url": session.url}
+
+
+# Stripe redelivers events until acknowledged; remember recent ids so
+# retries return 200 without touching the database again.
+_seen_events: OrderedDict = OrderedDict()
+_MAX_SEEN_EVENTS = 10_000
+
+
+@app.post("/webhook/stripe")
+async def stripe_webhook(request: Request, bg: BackgroundTasks):
+    payload = await request.body()
+    sig_header = request.headers.get("stripe-signature", "")
+    try:
+        # construct_event HMACs the whole payload — CPU work that would
+        # otherwise run on the event loop during webhook bursts.
+        event = await asyncio.get_running_loop().run_in_executor(
+            None,
+            stripe.Webhook.construct_event,
+            payload,
+            sig_header,
+            CONFIG["stripe_webhook_secret"],
+        )
+    except (ValueError, stripe.error.SignatureVerificationError):
+        raise HTTPException(status_code=400, detail="Invalid webhook")
+    event_id = event["id"]
+    if event_id in _seen_events:
+        return {"status": "received"}
+    _seen_events[event_id] = None
+    if len(_seen_events) > _MAX_SEEN_EVENTS:
+        _seen_events.popitem(last=False)
+    if event["type"] == "checkout.session.completed":
+        session = event["data"]["object"]
+        user_id = session.get("client_reference_id")
+        new_tier = int(
+            (session.get("metadata") or {}).get("tier", int(Tier.PRO))
+        )
+        if user_id:
+            # Acknowledge first, update after the response is on the
+            # wire: Stripe stops retrying as soon as it sees the 2xx,
+            # and DB contention no longer eats into its timeout budget.
+            bg.add_task(_apply_tier_update, user_id, new_tier)
+    return {"status": "received"}
+
+
+def _apply_tier_update(user_id: str, new_tier: int):
+    conn = get_db()
+    # BEGIN IMMEDIATE takes the write lock up front so the update can't
+    # deadlock against autocommit writers mid-transaction.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(_SQL_UPDATE_TIER, (new_tier, user_id))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<title>AI Content Generator</title>
+<style>
+body { font-family: -apple-system, sans-serif; max-width: 720px;
+       margin: 40px auto; padding: 0 16px; color: #1a1a2e; }
+textarea, select, input { width: 100%; padding: 8px; margin: 6px 0; }
+button { background: #4361ee; color: #fff; border: 0; padding: 10px 18px;
+         border-radius: 6px; cursor: pointer; }
+pre { background: #f5f5f5; padding: 12px; white-space: pre-wrap; }
+</style>
+</head>
+<body>
+<h1>✨ AI Content Generator</h1>
+<p>Paste your API key, pick a content type, describe what you need.</p>
+<input id="key" placeholder="sk-..." />
+<select id="type">
+<option value="product_description">Product description</option>
+<option value="social_post">Social media post</option>
+<option value="email_subject">Email subject line</option>
+<option value="blog_intro">Blog introduction</option>
+</select>
+<textarea id="prompt" rows="4" placeholder="A handmade ceramic mug..."></textarea>
+<button onclick="generate()">Generate</button>
+<pre id="out"></pre>
+<script>
+async function generate() {
+  const out = document.getElementById('out');
+  out.textContent = '';
+  const resp = await fetch('/api/v1/generate', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'X-API-Key': document.getElementById('key').value,
+    },
+    body: JSON.stringify({
+      prompt: document.getElementById('prompt').value,
+      content_type: document.getElementById('type').value,
+    }),
+  });
+  if (!resp.ok) {
+    const err = await resp.json();
+    out.textContent = err.detail || 'Error';
+    return;
+  }
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) return;
+    buf += decoder.decode(value, { stream: true });
+    const frames = buf.split('\n\n');
+    buf = frames.pop();
+    for (const frame of frames) {
+      if (!frame.startsWith('data: ')) continue;
+      const payload = frame.slice(6);
+      if (payload === '[DONE]') return;
+      const data = JSON.parse(payload);
+      if (data.delta) out.textContent += data.delta;
     }
+  }
+}
+</script>
+</body>
+</html>"""
+
+# The dashboard is static per process, so encode, compress and tag it
+# once at import. Repeat visitors get a 304 off the ETag; first visits
+# get the gzip variant when the client accepts it.
+_HTML_BYTES = DASHBOARD_HTML.encode()
+_HTML_GZ = gzip.compress(_HTML_BYTES, 6)
+_HTML_ETAG = '"' + hashlib.md5(_HTML_BYTES).hexdigest() + '"'
+
+
+def _static_page(request: Request, raw: bytes, gz: bytes, etag: str):
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gz, media_type="text/html", headers=headers)
+    return Response(content=raw, media_type="text/html", headers=headers)
+
+
+@app.get("/")
+async def dashboard(request: Request):
+    return _static_page(request, _HTML_BYTES, _HTML_GZ, _HTML_ETAG)
+
+
+_SUCCESS_BYTES = (
+    b"<h1>\xf0\x9f\x8e\x89 Upgrade complete</h1>"
+    b"<p>Your new limits are live.</p>"
+)
+_SUCCESS_GZ = gzip.compress(_SUCCESS_BYTES, 6)
+_SUCCESS_ETAG = '"' + hashlib.md5(_SUCCESS_BYTES).hexdigest() + '"'
+
+_CANCEL_BYTES = b"<h1>Checkout cancelled</h1><p>No charge was made.</p>"
+_CANCEL_GZ = gzip.compress(_CANCEL_BYTES, 6)
+_CANCEL_ETAG = '"' + hashlib.md5(_CANCEL_BYTES).hexdigest() + '"'
+
+
+@app.get("/success")
+async def success(request: Request):
+    return _static_page(request, _SUCCESS_BYTES, _SUCCESS_GZ, _SUCCESS_ETAG)
+
+
+@app.get("/cancel")
+async def cancel(request: Request):
+    return _static_page(request, _CANCEL_BYTES, _CANCEL_GZ, _CANCEL_ETAG)
 
 
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+if __name__ == "__main__":
+    # Import string (not the app object) so uvicorn can fork workers;
+    # uvloop + httptools roughly double per-worker throughput over the
+    # stdlib loop and h11. Module state (DB, caches) is per-worker.
+    uvicorn.run(
+        "money:app",
+        host="0.0.0.0",
+        port=CONFIG["port"],
+        workers=os.cpu_count(),
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False,
+    )
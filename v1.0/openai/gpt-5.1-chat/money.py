@@ -1,17 +1,248 @@
-from fastapi import FastAPI
+#!/usr/bin/env python3
+"""
+Crypto Alpha Publisher
+Pulls trending coins from CoinGecko every cycle, asks OpenAI for a short
+"alpha" write-up, and publishes it to a Discord channel via webhook.
+Set DRY_RUN=1 to print instead of posting.
+"""
 
-from app.core.config import settings
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
-app = FastAPI(title="API", version="0.0.1")
+import jinja2
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-@app.get("/")
-async def root():
-    return {
-        "message": settings.APP_DOMAIN,
-        "status": "running",
-    }
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger("moneymaker")
 
+SLEEP_INTERVAL = int(os.getenv("SLEEP_INTERVAL", "3600"))
+DRY_RUN = os.getenv("DRY_RUN", "0") == "1"
 
-@app.get("/health")
-async def health():
-    return {"status": "healthy"}
+# Compiled once at import; the per-cycle cost is a render with one
+# variable rather than re-evaluating a multi-line f-string.
+_SYSTEM_PROMPT = "You are a crypto market analyst."
+_PROMPT_TEMPLATE = jinja2.Template(
+    "The currently trending coins are: {{ coins_str }}. "
+    "Write a short, punchy market-alpha update (under 150 words) "
+    "summarizing why these coins might be moving. "
+    "No financial advice disclaimer needed."
+)
+
+# Stale-while-revalidate cache for CoinGecko (10 req/min public tier):
+# fresh hits return instantly, stale hits return the old value and kick
+# one background refresh, and only a fully expired entry blocks.
+_TRENDING_URL = "https://api.coingecko.com/api/v3/search/trending"
+_FRESH_TTL = 60.0
+_STALE_TTL = 300.0
+_trending_cache: dict = {}
+_refresh_lock = threading.Lock()
+_refreshing: set = set()
+
+
+class MoneyMakerBot:
+    def __init__(self):
+        self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
+        self.discord_webhook = os.getenv("DISCORD_WEBHOOK_URL", "")
+        self.headers = {
+            "User-Agent": "MoneyMakerBot/1.0",
+            "Accept": "application/json",
+        }
+        # One pooled session for CoinGecko/OpenAI/Discord: keep-alive skips
+        # the per-call TCP+TLS handshake and the adapter retries transient
+        # failures (incl. 429s from CoinGecko's public tier) with backoff.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=1.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self._last_post_sha: Optional[str] = None
+
+    def get_trending_coins(self) -> List[Dict]:
+        entry = _trending_cache.get(_TRENDING_URL)
+        if entry is not None:
+            ts, coins = entry
+            age = time.time() - ts
+            if age < _FRESH_TTL:
+                return coins
+            if age < _STALE_TTL:
+                self._schedule_trending_refresh()
+                return coins
+        return self._fetch_trending_coins()
+
+    def _schedule_trending_refresh(self):
+        # Single-flight: only one thread refreshes a stale entry at a time.
+        with _refresh_lock:
+            if _TRENDING_URL in _refreshing:
+                return
+            _refreshing.add(_TRENDING_URL)
+        threading.Thread(target=self._refresh_trending, daemon=True).start()
+
+    def _refresh_trending(self):
+        try:
+            self._fetch_trending_coins()
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(_TRENDING_URL)
+
+    def _fetch_trending_coins(self) -> List[Dict]:
+        try:
+            response = self.session.get(
+                "https://api.coingecko.com/api/v3/search/trending",
+                timeout=(3, 10),
+            )
+            if response.status_code != 200:
+                logger.warning("CoinGecko returned %d", response.status_code)
+                return []
+            data = orjson.loads(response.content)
+            coins = [
+                {"id": item["item"]["id"], "name": item["item"]["name"]}
+                for item in data.get("coins", [])[:7]
+            ]
+            if coins:
+                _trending_cache[_TRENDING_URL] = (time.time(), coins)
+            return coins
+        except requests.RequestException as exc:
+            logger.warning("Trending fetch failed: %s", exc)
+            return []
+
+    def _fetch_coin_moves(self, coins: List[Dict]) -> Dict[str, float]:
+        """24h price change per coin id, fetched concurrently.
+
+        The detail endpoint is one request per coin; four workers hide
+        most of the latency while staying under CoinGecko's public rate
+        limit (the adapter's Retry absorbs the occasional 429).
+        """
+        def fetch_one(coin_id: str):
+            try:
+                response = self.session.get(
+                    f"https://api.coingecko.com/api/v3/coins/{coin_id}",
+                    params={
+                        "localization": "false",
+                        "tickers": "false",
+                        "community_data": "false",
+                        "developer_data": "false",
+                    },
+                    timeout=(3, 10),
+                )
+                if response.status_code != 200:
+                    return coin_id, None
+                data = orjson.loads(response.content)
+                change = data["market_data"]["price_change_percentage_24h"]
+                return coin_id, change
+            except (requests.RequestException, KeyError, TypeError):
+                return coin_id, None
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = pool.map(fetch_one, [c["id"] for c in coins])
+        return {cid: chg for cid, chg in results if chg is not None}
+
+    def generate_alpha_content(self, coins: List[Dict]) -> Optional[str]:
+        moves = self._fetch_coin_moves(coins)
+        coins_str = ", ".join(
+            f"{c['name']} ({moves[c['id']]:+.1f}% 24h)"
+            if c["id"] in moves else c["name"]
+            for c in coins
+        )
+        prompt = _PROMPT_TEMPLATE.render(coins_str=coins_str)
+        try:
+            response = self.session.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.openai_api_key}",
+                    "Content-Type": "application/json",
+                },
+                data=orjson.dumps({
+                    "model": "gpt-4o-mini",
+                    "messages": [
+                        {"role": "system", "content": _SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt},
+                    ],
+                    "max_tokens": 300,
+                }),
+                timeout=(3, 30),
+            )
+            if response.status_code != 200:
+                logger.warning("OpenAI returned %d", response.status_code)
+                return None
+            result = orjson.loads(response.content)
+            return result["choices"][0]["message"]["content"]
+        except requests.RequestException as exc:
+            logger.warning("Content generation failed: %s", exc)
+            return None
+
+    def publish_content(self, content: str) -> bool:
+        # Discord webhooks allow ~30 req/min per channel; don't spend
+        # that budget re-posting a byte-identical update.
+        digest = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+        if digest == self._last_post_sha:
+            logger.info("Content unchanged since last post, skipping")
+            return False
+        if DRY_RUN:
+            print(f"--- DRY RUN ---\n{content}\n---------------")
+            self._last_post_sha = digest
+            return True
+        if not self.discord_webhook:
+            logger.warning("No Discord webhook configured")
+            return False
+        try:
+            response = self.session.post(
+                self.discord_webhook,
+                data=orjson.dumps({"content": content}),
+                headers={"Content-Type": "application/json"},
+                timeout=(3, 10),
+            )
+            if response.status_code in (200, 204):
+                self._last_post_sha = digest
+                return True
+            return False
+        except requests.RequestException as exc:
+            logger.warning("Discord publish failed: %s", exc)
+            return False
+
+    async def run(self):
+        logger.info("💸 MoneyMakerBot started (interval %ds)", SLEEP_INTERVAL)
+        # The pipeline stages stay on the pooled requests.Session (its
+        # Retry adapter and the thread-pool coin fetch are sync), so each
+        # stage runs in a worker thread while the loop itself sleeps with
+        # asyncio.sleep — no OS thread burned for an hour between cycles.
+        while True:
+            coins = await asyncio.to_thread(self.get_trending_coins)
+            if coins:
+                content = await asyncio.to_thread(
+                    self.generate_alpha_content, coins
+                )
+                if content and await asyncio.to_thread(
+                    self.publish_content, content
+                ):
+                    logger.info("Published alpha on: %s",
+                                ", ".join(c["name"] for c in coins))
+            else:
+                logger.info("No API data received")
+            await asyncio.sleep(SLEEP_INTERVAL)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(MoneyMakerBot().run())
+    except KeyboardInterrupt:
+        pass
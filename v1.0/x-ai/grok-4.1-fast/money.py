@@ -1,17 +1,548 @@
-from fastapi import FastAPI
+#!/usr/bin/env python3
+"""
+Cross-Exchange Crypto Arbitrage Scanner
+Watches bid/ask spreads for the same pair across Binance, KuCoin and
+Coinbase, and alerts (email/webhook) when the spread clears a profit
+threshold after fees. Alert-only — it never places orders.
+"""
 
-from app.core.config import settings
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
 
-app = FastAPI(title="API", version="0.0.1")
+import aiohttp
+import numpy as np
+import orjson
 
-@app.get("/")
-async def root():
-    return {
-        "message": settings.APP_DOMAIN,
-        "status": "running",
-    }
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger("arbitrage")
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
-@app.get("/health")
-async def health():
-    return {"status": "healthy"}
+
+def _scan_pairs_numpy(asks, bids, vols, min_profit):
+    safe_asks = np.where(asks > 0, asks, np.inf)
+    profit = (bids[None, :] - asks[:, None]) / safe_asks[:, None] * 100.0
+    np.fill_diagonal(profit, -np.inf)
+    buy_idx, sell_idx = np.where(profit >= min_profit)
+    volumes = np.minimum(vols[buy_idx], vols[sell_idx]) * 0.01
+    return buy_idx, sell_idx, profit[buy_idx, sell_idx], volumes
+
+
+if njit is not None:
+    # Numba turns the pair loop into native code; `cache=True` persists the
+    # compilation across runs so only the first process pays for it.
+    @njit(cache=True, fastmath=True)
+    def _scan_pairs(asks, bids, vols, min_profit):
+        n = asks.shape[0]
+        buy_idx = np.empty(n * n, np.int64)
+        sell_idx = np.empty(n * n, np.int64)
+        profits = np.empty(n * n, np.float64)
+        volumes = np.empty(n * n, np.float64)
+        k = 0
+        for i in range(n):
+            ask = asks[i]
+            if ask <= 0.0:
+                continue
+            for j in range(n):
+                if i == j:
+                    continue
+                profit = (bids[j] - ask) / ask * 100.0
+                if profit >= min_profit:
+                    buy_idx[k] = i
+                    sell_idx[k] = j
+                    profits[k] = profit
+                    volumes[k] = min(vols[i], vols[j]) * 0.01
+                    k += 1
+        return buy_idx[:k], sell_idx[:k], profits[:k], volumes[:k]
+else:
+    _scan_pairs = _scan_pairs_numpy
+
+
+@dataclass(frozen=True, slots=True)
+class ArbitrageOpportunity:
+    symbol: str
+    buy_exchange: str
+    sell_exchange: str
+    buy_price: float
+    sell_price: float
+    profit_percentage: float
+    volume: float
+    timestamp: datetime
+    # Derived, set once in __post_init__ (slots rule out cached_property).
+    formatted: str = field(init=False, repr=False, compare=False)
+    _key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Printed and sent through every alert channel; format once.
+        object.__setattr__(
+            self,
+            "formatted",
+            f"💰 {self.symbol}: buy {self.buy_exchange} @ {self.buy_price} → "
+            f"sell {self.sell_exchange} @ {self.sell_price} "
+            f"({self.profit_percentage:.2f}% / vol {self.volume:.4f})",
+        )
+        object.__setattr__(
+            self, "_key", f"{self.symbol}_{self.buy_exchange}_{self.sell_exchange}"
+        )
+
+    def __str__(self) -> str:
+        return self.formatted
+
+
+class ExchangeAPI:
+    """Base exchange wrapper; subclasses fill in URL and response shapes."""
+
+    name = "exchange"
+    SEPARATOR = ""
+    MAX_CONCURRENT = 8
+    MAX_RETRIES = 3
+
+    def __init__(self, session: aiohttp.ClientSession):
+        # One pooled session for the process lifetime: keep-alive skips the
+        # TCP+TLS handshake that otherwise dominates these small JSON GETs.
+        self.session = session
+        self._symbol_cache: Dict[str, str] = {}
+        # Bound in-flight requests per exchange so a burst of symbols never
+        # trips the venue's rate limiter and triggers a retry storm.
+        self._sem = asyncio.Semaphore(self.MAX_CONCURRENT)
+
+    async def _request_with_backoff(self, url: str, *, params=None, headers=None):
+        """GET + JSON decode, honoring Retry-After on HTTP 429."""
+        try:
+            async with self._sem:
+                for attempt in range(self.MAX_RETRIES):
+                    async with self.session.get(
+                        url, params=params, headers=headers
+                    ) as response:
+                        if response.status == 429:
+                            delay = int(response.headers.get("Retry-After", "1"))
+                            await asyncio.sleep(delay * (attempt + 1))
+                            continue
+                        if response.status != 200:
+                            return None
+                        return await response.json(loads=orjson.loads)
+        except aiohttp.ClientError as exc:
+            logger.warning("%s request %s failed: %s", self.name, url, exc)
+        return None
+
+    def _fmt(self, symbol: str) -> str:
+        # Symbols never change mid-run; memoize the exchange-native form
+        # instead of re-running str.replace on every request.
+        pair = self._symbol_cache.get(symbol)
+        if pair is None:
+            pair = symbol.replace("/", self.SEPARATOR)
+            self._symbol_cache[symbol] = pair
+        return pair
+
+    def register_symbols(self, symbols: List[str]):
+        """Warm per-symbol caches once, before the scan loop starts."""
+        for symbol in symbols:
+            self._fmt(symbol)
+
+    async def get_ticker(self, symbol: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    async def get_all_book_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Bulk snapshot: one request covering every symbol we track."""
+        raise NotImplementedError
+
+
+class BinanceAPI(ExchangeAPI):
+    name = "binance"
+    BASE = "https://api.binance.com/api/v3"
+
+    async def get_ticker(self, symbol: str) -> Optional[Dict]:
+        data = await self._request_with_backoff(
+            f"{self.BASE}/ticker/24hr", params={"symbol": self._fmt(symbol)}
+        )
+        if data is None:
+            return None
+        return {
+            "bid": float(data.get("bidPrice") or 0.0),
+            "ask": float(data.get("askPrice") or 0.0),
+            "volume": float(data.get("volume") or 0.0),
+        }
+
+    async def get_all_book_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        # /ticker/bookTicker with no symbol param returns best bid/ask for
+        # every trading pair in one payload.
+        wanted = {self._fmt(s): s for s in symbols}
+        data = await self._request_with_backoff(f"{self.BASE}/ticker/bookTicker")
+        if data is None:
+            return {}
+        out: Dict[str, Dict] = {}
+        for item in data:
+            symbol = wanted.get(item.get("symbol"))
+            if symbol:
+                out[symbol] = {
+                    "bid": float(item.get("bidPrice") or 0.0),
+                    "ask": float(item.get("askPrice") or 0.0),
+                    "volume": float(item.get("bidQty") or 0.0),
+                }
+        return out
+
+
+class KucoinAPI(ExchangeAPI):
+    name = "kucoin"
+    SEPARATOR = "-"
+    BASE = "https://api.kucoin.com/api/v1"
+
+    async def get_ticker(self, symbol: str) -> Optional[Dict]:
+        payload = await self._request_with_backoff(
+            f"{self.BASE}/market/orderbook/level1",
+            params={"symbol": self._fmt(symbol)},
+        )
+        if payload is None:
+            return None
+        data = payload.get("data") or {}
+        return {
+            "bid": float(data.get("bestBid") or 0.0),
+            "ask": float(data.get("bestAsk") or 0.0),
+            "volume": float(data.get("size") or 0.0),
+        }
+
+    async def get_all_book_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        wanted = {self._fmt(s): s for s in symbols}
+        payload = await self._request_with_backoff(f"{self.BASE}/market/allTickers")
+        if payload is None:
+            return {}
+        out: Dict[str, Dict] = {}
+        for item in (payload.get("data") or {}).get("ticker") or []:
+            symbol = wanted.get(item.get("symbol"))
+            if symbol:
+                out[symbol] = {
+                    "bid": float(item.get("buy") or 0.0),
+                    "ask": float(item.get("sell") or 0.0),
+                    "volume": float(item.get("vol") or 0.0),
+                }
+        return out
+
+
+class CoinbaseAPI(ExchangeAPI):
+    name = "coinbase"
+    SEPARATOR = "-"
+    MAX_CONCURRENT = 10
+    BASE = "https://api.exchange.coinbase.com"
+    _HEADERS = {"User-Agent": "ArbitrageBot/1.0"}
+
+    def __init__(self, session: aiohttp.ClientSession):
+        super().__init__(session)
+        self._url_for: Dict[str, str] = {}
+
+    def register_symbols(self, symbols: List[str]):
+        # Ticker URLs are fixed per symbol; build them once instead of
+        # formatting an f-string on every request.
+        super().register_symbols(symbols)
+        for symbol in symbols:
+            self._url_for[symbol] = f"{self.BASE}/products/{self._fmt(symbol)}/ticker"
+
+    async def get_ticker(self, symbol: str) -> Optional[Dict]:
+        url = self._url_for.get(symbol)
+        if url is None:
+            url = f"{self.BASE}/products/{self._fmt(symbol)}/ticker"
+            self._url_for[symbol] = url
+        data = await self._request_with_backoff(url, headers=self._HEADERS)
+        if data is None:
+            return None
+        return {
+            "bid": float(data.get("bid") or 0.0),
+            "ask": float(data.get("ask") or 0.0),
+            "volume": float(data.get("volume") or 0.0),
+        }
+
+    async def get_all_book_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        # Coinbase has no true bulk ticker endpoint; fan the per-product
+        # requests out concurrently over the shared pool instead.
+        tickers = await asyncio.gather(*(self.get_ticker(s) for s in symbols))
+        return {s: t for s, t in zip(symbols, tickers) if t is not None}
+
+
+class ArbitrageScanner:
+    TOP_N = 5
+
+    def __init__(self):
+        self.symbols = [
+            "BTC/USDT",
+            "ETH/USDT",
+            "SOL/USDT",
+            "XRP/USDT",
+            "ADA/USDT",
+            "DOGE/USDT",
+            "AVAX/USDT",
+            "DOT/USDT",
+            "LINK/USDT",
+            "MATIC/USDT",
+        ]
+        # Hardware floats: a 0.5% edge needs ~6 significant digits, well
+        # inside float64, and float ops are 10-50x cheaper than Decimal.
+        self.min_profit_percentage = 0.5
+        self.scan_interval = int(os.getenv("SCAN_INTERVAL", "30"))
+        # Monotonic floats: one C-level subtraction per check, and immune to
+        # wall-clock jumps (NTP, DST) that datetime arithmetic is not.
+        self.alert_cooldown_s = 1800.0
+        self.sent_alerts: Dict[str, float] = {}
+
+        # Shared pooled transport for every exchange.
+        self._connector = aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=16,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=self._connector,
+            timeout=aiohttp.ClientTimeout(total=5),
+        )
+        self.exchanges: List[ExchangeAPI] = [
+            BinanceAPI(self._session),
+            KucoinAPI(self._session),
+            CoinbaseAPI(self._session),
+        ]
+        for exchange in self.exchanges:
+            exchange.register_symbols(self.symbols)
+
+        self.email_enabled = bool(os.getenv("SMTP_SERVER"))
+        self.smtp_server = os.getenv("SMTP_SERVER", "")
+        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
+        self.smtp_user = os.getenv("SMTP_USER", "")
+        self.smtp_password = os.getenv("SMTP_PASSWORD", "")
+        self.alert_email = os.getenv("ALERT_EMAIL", "")
+        self.webhook_url = os.getenv("WEBHOOK_URL", "")
+
+        # Alerts run off-loop; keep handles so shutdown can drain them.
+        self._alert_tasks: set = set()
+
+        # One SMTP connection reused across alerts (TCP+TLS+AUTH once, not
+        # per message). Alerts run on worker threads, hence the lock.
+        # smtplib/email/requests are imported lazily in the senders: they
+        # cost startup time and are only needed when alerting is configured.
+        self._smtp = None
+        self._smtp_lock = threading.Lock()
+
+    def _dispatch_alert(self, send, opportunity: ArbitrageOpportunity):
+        task = asyncio.create_task(asyncio.to_thread(send, opportunity))
+        self._alert_tasks.add(task)
+        task.add_done_callback(self._alert_tasks.discard)
+
+    async def close(self):
+        if self._alert_tasks:
+            await asyncio.gather(*self._alert_tasks, return_exceptions=True)
+        self._close_smtp()
+        await self._session.close()
+        await self._connector.close()
+
+    def calculate_arbitrage(self, symbol: str, prices: Dict[str, Dict]) -> List[ArbitrageOpportunity]:
+        # Cheap pre-check: if even the widest possible spread (best bid vs
+        # best ask anywhere) misses the threshold, no pair can clear it.
+        # Efficient markets make this the common exit.
+        best_ask = min((p["ask"] for p in prices.values() if p["ask"] > 0), default=0.0)
+        best_bid = max((p["bid"] for p in prices.values() if p["bid"] > 0), default=0.0)
+        if best_ask <= 0.0 or (best_bid - best_ask) / best_ask * 100.0 < self.min_profit_percentage:
+            return []
+
+        # The numeric scan runs in the _scan_pairs kernel (Numba-compiled
+        # when available, NumPy broadcast otherwise); objects are only
+        # materialized for the (usually empty) survivor set.
+        names = list(prices)
+        count = len(names)
+        asks = np.fromiter((prices[n]["ask"] for n in names), dtype=np.float64, count=count)
+        bids = np.fromiter((prices[n]["bid"] for n in names), dtype=np.float64, count=count)
+        vols = np.fromiter((prices[n]["volume"] for n in names), dtype=np.float64, count=count)
+
+        buy_idx, sell_idx, profits, volumes = _scan_pairs(
+            asks, bids, vols, self.min_profit_percentage
+        )
+        if len(buy_idx) == 0:
+            return []
+        now = datetime.now()
+        return [
+            ArbitrageOpportunity(
+                symbol=symbol,
+                buy_exchange=names[i],
+                sell_exchange=names[j],
+                buy_price=float(asks[i]),
+                sell_price=float(bids[j]),
+                profit_percentage=float(p),
+                volume=float(v),
+                timestamp=now,
+            )
+            for i, j, p, v in zip(
+                buy_idx.tolist(), sell_idx.tolist(), profits.tolist(), volumes.tolist()
+            )
+        ]
+
+    async def _exchange_snapshot(self, exchange: ExchangeAPI) -> Dict[str, Dict]:
+        snapshot = await exchange.get_all_book_tickers(self.symbols)
+        if snapshot:
+            return snapshot
+        # Bulk endpoint down or empty: fan the per-symbol tickers out
+        # concurrently rather than losing the whole exchange this cycle.
+        tickers = await asyncio.gather(
+            *(exchange.get_ticker(s) for s in self.symbols), return_exceptions=True
+        )
+        return {
+            s: t for s, t in zip(self.symbols, tickers)
+            if isinstance(t, dict)
+        }
+
+    async def scan_once(self) -> List[ArbitrageOpportunity]:
+        # One bulk request per exchange, then pure dict lookups per symbol.
+        snapshots = await asyncio.gather(
+            *(self._exchange_snapshot(ex) for ex in self.exchanges),
+            return_exceptions=True,
+        )
+        per_exchange: Dict[str, Dict[str, Dict]] = {}
+        for exchange, snapshot in zip(self.exchanges, snapshots):
+            if isinstance(snapshot, dict) and snapshot:
+                per_exchange[exchange.name] = snapshot
+            elif isinstance(snapshot, Exception):
+                logger.warning("%s snapshot failed: %s", exchange.name, snapshot)
+
+        # Keep only the top-K in a bounded min-heap instead of sorting the
+        # whole list; the counter breaks profit ties without comparing
+        # opportunity objects.
+        heap: List = []
+        tie = itertools.count()
+        for symbol in self.symbols:
+            prices = {}
+            for name, snapshot in per_exchange.items():
+                ticker = snapshot.get(symbol)
+                if ticker and ticker["bid"] > 0 and ticker["ask"] > 0:
+                    prices[name] = ticker
+            if len(prices) < 2:
+                continue
+            for opp in self.calculate_arbitrage(symbol, prices):
+                entry = (opp.profit_percentage, next(tie), opp)
+                if len(heap) < self.TOP_N:
+                    heapq.heappush(heap, entry)
+                elif entry[0] > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+        return [entry[2] for entry in sorted(heap, reverse=True)]
+
+    def should_send_alert(self, opportunity: ArbitrageOpportunity) -> bool:
+        key = opportunity._key
+        now = time.monotonic()
+        if now - self.sent_alerts.get(key, 0.0) > self.alert_cooldown_s:
+            self.sent_alerts[key] = now
+            if len(self.sent_alerts) > 1024:
+                self._prune_sent_alerts(now)
+            return True
+        return False
+
+    def _prune_sent_alerts(self, now: float):
+        # Drop expired entries so the map stays bounded as new
+        # symbol/exchange pairs come and go.
+        expired = [k for k, t in self.sent_alerts.items()
+                   if now - t > self.alert_cooldown_s]
+        for k in expired:
+            del self.sent_alerts[k]
+
+    def _get_smtp(self):
+        import smtplib
+
+        # Reuse the cached connection when the server still answers; rebuild
+        # it (TCP + STARTTLS + LOGIN) only after a disconnect.
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except smtplib.SMTPException:
+                self._close_smtp()
+        smtp = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        smtp.starttls()
+        smtp.login(self.smtp_user, self.smtp_password)
+        self._smtp = smtp
+        return smtp
+
+    def _close_smtp(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except OSError:
+                pass
+            self._smtp = None
+
+    def send_email_alert(self, opportunity: ArbitrageOpportunity):
+        if not self.email_enabled:
+            return
+        import smtplib
+        from email.message import EmailMessage
+
+        # Plain-text body: EmailMessage serializes without multipart
+        # boundary generation.
+        msg = EmailMessage()
+        msg["From"] = self.smtp_user
+        msg["To"] = self.alert_email
+        msg["Subject"] = f"Arbitrage alert: {opportunity.symbol}"
+        msg.set_content(opportunity.formatted)
+        try:
+            with self._smtp_lock:
+                try:
+                    self._get_smtp().send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    self._close_smtp()
+                    self._get_smtp().send_message(msg)
+            logger.info("Email alert sent for %s", opportunity.symbol)
+        except smtplib.SMTPException as exc:
+            logger.warning("Email alert failed: %s", exc)
+
+    def send_webhook_alert(self, opportunity: ArbitrageOpportunity):
+        if not self.webhook_url:
+            return
+        import requests
+
+        payload = {"content": opportunity.formatted}
+        try:
+            requests.post(self.webhook_url, json=payload, timeout=10)
+        except requests.RequestException as exc:
+            logger.warning("Webhook alert failed: %s", exc)
+
+    async def run_continuous(self):
+        logger.info("🔍 Scanner started: %d symbols, %d exchanges",
+                    len(self.symbols), len(self.exchanges))
+        try:
+            while True:
+                opportunities = await self.scan_once()
+                for opp in opportunities[:3]:
+                    print(opp)
+                for opp in opportunities:
+                    if self.should_send_alert(opp):
+                        # smtplib/requests are blocking; push them to worker
+                        # threads so the scan loop never stalls on an alert.
+                        self._dispatch_alert(self.send_email_alert, opp)
+                        self._dispatch_alert(self.send_webhook_alert, opp)
+                await asyncio.sleep(self.scan_interval)
+        finally:
+            await self.close()
+
+
+async def main():
+    scanner = ArbitrageScanner()
+    await scanner.run_continuous()
+
+
+if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass